@@ -1,63 +1,170 @@
 """
 Running this program creates a phone call using a Single Prompt Retell AI Agent. 
-It then polls until the response is received, downloads relevant files,
-and optionally scrubs sensitive data from the call record.
+It then waits for Retell's call_ended webhook (or polls if no webhook port is
+configured), downloads relevant files, and optionally scrubs sensitive data
+from the call record.
 """
 
+from __future__ import annotations
+
 import os
+import json
+import atexit
 import time
+import queue
+import random
+import shutil
+import sqlite3
 import logging
-import requests
-from dotenv import load_dotenv
-from retell import Retell
+import logging.handlers
+import threading
+import orjson
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import TYPE_CHECKING, Callable, Optional, Dict, Any, List, Tuple
+
+if TYPE_CHECKING:
+    import requests
+    from retell import Retell
+
+# Resolved once at import; override via the process environment
+APPL_LOG_DIR = os.environ.get('APPL_LOG_DIR', './logs/appl_logs')
+CALL_LOG_DIR = os.environ.get('CALL_LOG_DIR', './logs/call_logs')
+WEBHOOK_EVENT_DB = os.environ.get('WEBHOOK_EVENT_DB', './logs/webhook_events.db')
+
+
+def _ensure_dirs() -> None:
+    """
+    Create the application and call log directories if they don't exist.
+    Runs once at import.
+    """
+    for directory in (APPL_LOG_DIR, CALL_LOG_DIR):
+        os.makedirs(directory, exist_ok=True)
+
+
+_ensure_dirs()
+
+# retell, requests and dotenv are imported where they are first needed, so
+# importing this module for a single helper doesn't pay for loading them.
+_requests = None
+# Shared across downloads so connections to the same host are kept alive and reused
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def _get_session() -> requests.Session:
+    """
+    Import requests and build the shared download session on first use.
+
+    Returns:
+        The module-wide requests.Session.
+    """
+    global _requests, _session
+    with _session_lock:
+        if _session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            from urllib3.util.retry import Retry
+
+            session = requests.Session()
+            session.mount('https://', HTTPAdapter(
+                pool_connections=4,
+                pool_maxsize=8,
+                max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[502, 503, 504]),
+            ))
+            atexit.register(session.close)
+            _requests = requests
+            _session = session
+        return _session
+
+
+# Listener owning the file and console handlers; replaced on each setup_logging() call
+_log_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def _stop_log_listener(listener: Optional[logging.handlers.QueueListener]) -> None:
+    """
+    Flush and stop a log listener, then close the handlers it owns.
+
+    Args:
+        listener: The listener to stop, or None.
+    """
+    if listener is None:
+        return
+    listener.stop()
+    for handler in listener.handlers:
+        handler.close()
 
 
-def setup_logging() -> None:
+def setup_logging(now: Optional[datetime] = None) -> None:
     """
     Set up logging configuration:
-    - Creates application and call log directories if they don't exist.
     - Configures file logging with a daily file based on current date.
     - Adds console logging to output logs to stdout.
-    """
-    current_date = datetime.now().strftime("%Y%m%d")
-    appl_log_dir = './logs/appl_logs'
-    call_log_dir = './logs/call_logs'
+    - Routes records through a queue so the file and console writes happen
+      on a background listener thread instead of the caller's.
+    - Stops the listener and closes the handlers from any previous call.
 
-    # Ensure directories exist
-    os.makedirs(appl_log_dir, exist_ok=True)
-    os.makedirs(call_log_dir, exist_ok=True)
+    Args:
+        now: Start time of the run, used to name the daily log file (default: current time).
+    """
+    current_date = (now or datetime.now()).strftime("%Y%m%d")
 
     # Configure logging to file and console
-    logging.basicConfig(
-        filename=f'{appl_log_dir}/appl_log_{current_date}.log',
-        filemode='a+',
-        level=logging.INFO,
-        format='%(asctime)s %(levelname)s %(message)s'
-    )
+    file_handler = logging.FileHandler(f'{APPL_LOG_DIR}/appl_log_{current_date}.log', mode='a+')
+    file_handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(message)s'))
     # Also log to console (stdout)
-    logging.getLogger().addHandler(logging.StreamHandler())
+    stream_handler = logging.StreamHandler()
+
+    log_queue: queue.Queue = queue.Queue(-1)
+    listener = logging.handlers.QueueListener(
+        log_queue, file_handler, stream_handler, respect_handler_level=True
+    )
+    listener.start()
 
+    root_logger = logging.getLogger()
+    for handler in root_logger.handlers[:]:
+        root_logger.removeHandler(handler)
+        handler.close()
+    root_logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    root_logger.setLevel(logging.INFO)
 
-def load_and_validate_env(var_name: str, cast_type: type = str) -> Any:
+    global _log_listener
+    previous_listener, _log_listener = _log_listener, listener
+    _stop_log_listener(previous_listener)
+
+
+atexit.register(lambda: _stop_log_listener(_log_listener))
+
+
+def load_and_validate_env(
+    var_name: str,
+    cast_type: Callable[[str], Any] = str,
+    required: bool = True
+) -> Any:
     """
     Load an environment variable and cast to the specified type.
     Raise an error if the variable is missing or cannot be cast.
 
     Args:
         var_name: Name of the environment variable
-        cast_type: Type to cast the environment variable to (default: str)
+        cast_type: Type or parser to cast the environment variable with (default: str)
+        required: Whether a missing variable is an error (default: True)
 
     Returns:
-        The environment variable value casted to `cast_type`.
+        The environment variable value casted to `cast_type`, or None if the
+        variable is missing and not required.
 
     Raises:
-        EnvironmentError: If the environment variable is missing.
+        EnvironmentError: If a required environment variable is missing.
         ValueError: If the environment variable cannot be cast to `cast_type`.
     """
     value = os.getenv(var_name)
     if value is None:
+        if not required:
+            return None
         raise EnvironmentError(f"Missing required environment variable: {var_name}")
     try:
         return cast_type(value)
@@ -65,6 +172,85 @@ def load_and_validate_env(var_name: str, cast_type: type = str) -> Any:
         raise ValueError(f"Environment variable {var_name} must be of type {cast_type.__name__}")
 
 
+_TRUTHY = frozenset({"yes", "true", "1", "y", "on"})
+
+
+def _parse_bool(value: str) -> bool:
+    """
+    Interpret an environment variable value as a boolean flag.
+
+    Args:
+        value: Raw environment variable value.
+
+    Returns:
+        True if the value is one of the truthy strings in _TRUTHY (case-insensitive).
+    """
+    return value.strip().lower() in _TRUTHY
+
+
+REQUIRED_ENV: Dict[str, Callable[[str], Any]] = {
+    "SCRUB_SENSITIVE_CALL_DATA": _parse_bool,
+    "RETELL_API_KEY": str,
+    "FROM_PHONE_NUMBER": str,
+    "TO_PHONE_NUMBER": str,
+    "MAX_WAIT_TIME": int,
+    "WAIT_INTERVAL": int,
+    "MY_FULL_NAME": str,
+    "MY_PHONE_NUMBER": str,
+    "MY_SSN": str,
+}
+OPTIONAL_ENV: Dict[str, Callable[[str], Any]] = {
+    "WEBHOOK_PORT": int,
+}
+
+
+@dataclass(frozen=True)
+class Config:
+    """
+    Script settings, read and validated once from the environment.
+    Field names are the lowercased environment variable names.
+    """
+    scrub_sensitive_call_data: bool
+    retell_api_key: str = field(repr=False)
+    from_phone_number: str
+    to_phone_number: str
+    max_wait_time: int
+    wait_interval: int
+    my_full_name: str
+    my_phone_number: str
+    my_ssn: str = field(repr=False)
+    webhook_port: Optional[int] = None
+
+    @classmethod
+    def from_env(cls) -> "Config":
+        """
+        Load `.env` and build a Config from the environment variables in
+        REQUIRED_ENV and OPTIONAL_ENV.
+
+        Raises:
+            EnvironmentError: If a required environment variable is missing.
+            ValueError: If an environment variable cannot be cast to its type.
+        """
+        from dotenv import load_dotenv
+
+        load_dotenv()
+        values = {
+            name.lower(): load_and_validate_env(name, cast_type)
+            for name, cast_type in REQUIRED_ENV.items()
+        }
+        values.update({
+            name.lower(): load_and_validate_env(name, cast_type, required=False)
+            for name, cast_type in OPTIONAL_ENV.items()
+        })
+        return cls(**values)
+
+
+# Bytes requested per read while streaming a download. Each read still allocates a
+# new bytes object: urllib3's readinto() is implemented on top of read(), so a
+# reused buffer would add a copy rather than save an allocation.
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+
 def download_file(url: str, output_file_path: str) -> None:
     """
     Download a file from a given URL and save it to the specified location.
@@ -78,18 +264,54 @@ def download_file(url: str, output_file_path: str) -> None:
         logging.warning(f"Invalid or missing URL provided for downloading: '{url}'")
         return
 
+    session = _get_session()
+    # Errors raised while streaming the body come straight from urllib3
+    from urllib3.exceptions import HTTPError as Urllib3HTTPError
+
+    file_opened = False
     try:
         logging.info(f"Starting download from {url} to {output_file_path}")
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        with open(output_file_path, 'wb') as f:
-            f.write(response.content)
+        # Stream straight to disk in chunks instead of buffering the whole file.
+        # os.sendfile can't be used here: downloads are HTTPS, so the bytes have
+        # to be decrypted in userspace before they can be written out.
+        with session.get(url, stream=True, timeout=(5, 30)) as response:
+            response.raise_for_status()
+            response.raw.decode_content = True
+            with open(output_file_path, 'wb') as f:
+                file_opened = True
+                shutil.copyfileobj(response.raw, f, length=DOWNLOAD_CHUNK_SIZE)
         logging.info(f"File saved as {output_file_path}")
-    except requests.RequestException as e:
+        return
+    except (_requests.RequestException, Urllib3HTTPError) as e:
         logging.error(f"Failed to download file from {url}. Error: {e}")
     except IOError as e:
         logging.error(f"Failed to write file {output_file_path}. Error: {e}")
 
+    # Don't leave a truncated file behind
+    if file_opened:
+        try:
+            os.remove(output_file_path)
+        except OSError as e:
+            logging.warning(f"Failed to remove partial file {output_file_path}. Error: {e}")
+
+
+def download_files(downloads: List[Tuple[str, str]]) -> None:
+    """
+    Download several files concurrently, one worker thread per file.
+    `download_file` is safe to call from multiple threads since the shared
+    session is thread-safe for `get`.
+
+    Args:
+        downloads: List of (url, output_file_path) pairs.
+    """
+    with ThreadPoolExecutor(max_workers=len(downloads)) as executor:
+        futures = [
+            executor.submit(download_file, url, output_file_path)
+            for url, output_file_path in downloads
+        ]
+        for future in futures:
+            future.result()
+
 
 def create_phone_call(
     sync_client: Retell,
@@ -146,6 +368,39 @@ def get_call_details(sync_client: Retell, call_id: str) -> Any:
         raise
 
 
+def get_call_status(sync_client: Retell, call_id: str) -> Tuple[Optional[str], Any]:
+    """
+    Retrieve the status of a previously created phone call.
+    Retell has no status-only endpoint, so this reads `call_status` from the
+    raw response body instead of building the full call details object.
+    The raw response is returned too, so the caller can `parse()` it into
+    the call details once the call has ended without fetching it again.
+
+    Args:
+        sync_client: An instance of Retell client.
+        call_id: The ID of the call to retrieve the status for.
+
+    Returns:
+        A (call status, raw response) tuple. The status is None if the
+        response doesn't include one.
+
+    Raises:
+        Exception if unable to retrieve the call status.
+    """
+    try:
+        raw_response = sync_client.call.with_raw_response.retrieve(call_id=call_id)
+        status = orjson.loads(raw_response.http_response.content).get('call_status')
+        return status, raw_response
+    except Exception as e:
+        logging.error(f"Error retrieving call status: {e}", exc_info=True)
+        raise
+
+
+INITIAL_POLL_INTERVAL = 1.0
+POLL_BACKOFF_FACTOR = 1.5
+POLL_JITTER = 0.2
+
+
 def poll_call_status(
     sync_client: Retell,
     call_id: str,
@@ -154,35 +409,254 @@ def poll_call_status(
 ) -> Optional[Any]:
     """
     Polls the Retell API for the call status until it ends or timeout occurs.
+    The full call details are parsed from the final status response, and only
+    fetched separately if polling times out or fails.
+    The delay between attempts backs off exponentially from
+    INITIAL_POLL_INTERVAL up to `wait_interval`, with +/-20% jitter.
 
     Args:
         sync_client: Retell client instance.
         call_id: Call identifier string.
         max_wait_sec: Maximum total time (in seconds) to wait before timing out.
-        wait_interval: Time (in seconds) to wait between polling attempts.
+        wait_interval: Maximum time (in seconds) to wait between polling attempts.
 
     Returns:
-        The final call response when the call ends, or None if timed out or error occurs.
+        The final call response, or None if it could not be retrieved.
     """
-    waited = 0
+    waited = 0.0
+    interval = min(INITIAL_POLL_INTERVAL, wait_interval)
     while waited < max_wait_sec:
         try:
-            call_response = get_call_details(sync_client, call_id)
-            status = getattr(call_response, 'call_status', None)
+            status, raw_response = get_call_status(sync_client, call_id)
             logging.info(f"Current call status: {status}")
             if status == 'ended':
-                return call_response
+                # The full call details are already in this response
+                return raw_response.parse()
         except Exception:
-            logging.error("Error getting call details during polling.", exc_info=True)
+            logging.error("Error getting call status during polling.", exc_info=True)
             break
 
-        time.sleep(wait_interval)
-        waited += wait_interval
+        delay = interval * random.uniform(1 - POLL_JITTER, 1 + POLL_JITTER)
+        time.sleep(delay)
+        waited += delay
+        interval = min(interval * POLL_BACKOFF_FACTOR, wait_interval)
+    else:
+        logging.warning("Call monitoring timed out. Exiting loop.")
 
-    logging.warning("Call monitoring timed out. Exiting loop.")
     try:
-        return call_response
-    except NameError:
+        return get_call_details(sync_client, call_id)
+    except Exception:
+        logging.error("Error getting call details after polling.", exc_info=True)
+        return None
+
+
+WEBHOOK_PATH = '/retell/webhook'
+
+# One Event per call_id, set by the webhook handler when Retell reports call_ended
+_call_ended_events: Dict[str, threading.Event] = {}
+_call_ended_events_lock = threading.Lock()
+
+
+def get_call_ended_event(call_id: str) -> threading.Event:
+    """
+    Return the Event signalled when the given call ends, creating it if needed.
+
+    Args:
+        call_id: Call identifier string.
+
+    Returns:
+        The threading.Event associated with `call_id`.
+    """
+    with _call_ended_events_lock:
+        return _call_ended_events.setdefault(call_id, threading.Event())
+
+
+def init_event_store(db_path: str) -> None:
+    """
+    Create the sqlite database directory and the table used to persist
+    webhook events, if they don't exist.
+
+    Args:
+        db_path: Path to the sqlite database file.
+    """
+    db_dir = os.path.dirname(db_path)
+    if db_dir:
+        os.makedirs(db_dir, exist_ok=True)
+    conn = sqlite3.connect(db_path)
+    try:
+        with conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS webhook_events ("
+                "call_id TEXT NOT NULL, event TEXT NOT NULL, "
+                "payload TEXT NOT NULL, received_at TEXT NOT NULL)"
+            )
+    finally:
+        conn.close()
+
+
+def save_webhook_event(db_path: str, call_id: str, event: str, payload: Dict[str, Any]) -> None:
+    """
+    Persist a webhook event so it survives a restart of the receiver.
+
+    Args:
+        db_path: Path to the sqlite database file.
+        call_id: Call identifier string.
+        event: Retell event name (e.g. 'call_ended').
+        payload: Parsed webhook JSON body.
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        with conn:
+            conn.execute(
+                "INSERT INTO webhook_events (call_id, event, payload, received_at) VALUES (?, ?, ?, ?)",
+                (call_id, event, json.dumps(payload), datetime.now().isoformat()),
+            )
+    finally:
+        conn.close()
+
+
+def has_call_ended(db_path: str, call_id: str) -> bool:
+    """
+    Check the event store for a previously received call_ended event.
+
+    Args:
+        db_path: Path to the sqlite database file.
+        call_id: Call identifier string.
+
+    Returns:
+        True if a call_ended event was stored for `call_id`.
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        row = conn.execute(
+            "SELECT 1 FROM webhook_events WHERE call_id = ? AND event = 'call_ended' LIMIT 1",
+            (call_id,),
+        ).fetchone()
+        return row is not None
+    finally:
+        conn.close()
+
+
+class RetellWebhookHandler(BaseHTTPRequestHandler):
+    """
+    Receive Retell webhook POSTs, verify the signature, persist the event
+    and wake up anyone waiting on the call's call_ended Event.
+    """
+
+    def do_POST(self) -> None:
+        if self.path != WEBHOOK_PATH:
+            self.send_error(404)
+            return
+
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            post_data = json.loads(self.rfile.read(length))
+        except ValueError:
+            self.send_error(400, "Invalid JSON body")
+            return
+
+        server = self.server
+        # Retell signs the compact JSON serialization of the body
+        valid_signature = server.sync_client.verify(
+            json.dumps(post_data, separators=(",", ":"), ensure_ascii=False),
+            api_key=server.api_key,
+            signature=str(self.headers.get("X-Retell-Signature")),
+        )
+        if not valid_signature:
+            logging.warning("Rejected webhook request with invalid signature.")
+            self.send_error(401)
+            return
+
+        event = post_data.get('event')
+        call_id = (post_data.get('call') or {}).get('call_id')
+        if not event or not call_id:
+            self.send_error(400, "Missing event or call_id")
+            return
+
+        try:
+            save_webhook_event(server.db_path, call_id, event, post_data)
+        except sqlite3.Error as e:
+            logging.error(f"Failed to persist webhook event {event} for call_id {call_id}: {e}")
+        logging.info(f"Received webhook event {event} for call_id: {call_id}")
+
+        if event == 'call_ended':
+            get_call_ended_event(call_id).set()
+
+        self.send_response(204)
+        self.end_headers()
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logging.debug(f"Webhook request: {format % args}")
+
+
+def start_webhook_server(sync_client: Retell, api_key: str, port: int, db_path: str) -> ThreadingHTTPServer:
+    """
+    Start the webhook receiver on a background daemon thread.
+
+    Args:
+        sync_client: Retell client instance, used to verify webhook signatures.
+        api_key: Retell API key the webhook signatures are computed with.
+        port: Local port to listen on.
+        db_path: Path to the sqlite database used to persist events.
+
+    Returns:
+        The running server; pass it to `stop_webhook_server()` when done.
+    """
+    init_event_store(db_path)
+    server = ThreadingHTTPServer(('', port), RetellWebhookHandler)
+    server.sync_client = sync_client
+    server.api_key = api_key
+    server.db_path = db_path
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    logging.info(f"Webhook receiver listening on port {port} at {WEBHOOK_PATH}")
+    return server
+
+
+def stop_webhook_server(server: ThreadingHTTPServer) -> None:
+    """
+    Stop the webhook receiver and release its listening socket.
+
+    Args:
+        server: Server returned by `start_webhook_server()`.
+    """
+    server.shutdown()
+    server.server_close()
+
+
+def wait_for_call_end(
+    sync_client: Retell,
+    call_id: str,
+    max_wait_sec: int,
+    db_path: str
+) -> Optional[Any]:
+    """
+    Block until the call_ended webhook arrives or timeout occurs, then
+    retrieve the call details once.
+
+    Args:
+        sync_client: Retell client instance.
+        call_id: Call identifier string.
+        max_wait_sec: Maximum total time (in seconds) to wait for the webhook.
+        db_path: Path to the sqlite database used to persist events.
+
+    Returns:
+        The final call response, or None if it could not be retrieved.
+    """
+    call_ended = get_call_ended_event(call_id)
+    try:
+        if has_call_ended(db_path, call_id):
+            call_ended.set()
+
+        if not call_ended.wait(timeout=max_wait_sec):
+            logging.warning("Timed out waiting for call_ended webhook. Fetching call details once.")
+    finally:
+        with _call_ended_events_lock:
+            _call_ended_events.pop(call_id, None)
+
+    try:
+        return get_call_details(sync_client, call_id)
+    except Exception:
+        logging.error("Error getting call details after waiting for webhook.", exc_info=True)
         return None
 
 
@@ -213,63 +687,82 @@ def scrub_call_data(sync_client: Retell, call_id: str) -> Any:
         raise
 
 
-def main() -> None:
+def main(config: Optional[Config] = None) -> None:
     """
     Main entry point for the script:
     - Sets up logging
-    - Loads environment variables
+    - Loads environment variables, unless a Config is passed in
     - Initiates phone call
-    - Polls call status until it ends or times out
+    - Waits for the call_ended webhook, or polls call status, until it ends or times out
     - Downloads recording and call log files
     - Logs summary information about the call
     - Optionally scrubs sensitive call data
+
+    Args:
+        config: Pre-built settings. If omitted, they are loaded with Config.from_env().
     """
-    setup_logging()
+    from retell import Retell
 
-    logging.info("Loading environment variables")
-    load_dotenv()
+    run_started_at = datetime.now()
+    setup_logging(run_started_at)
 
-    try:
-        scrub_sensitive_data = load_and_validate_env("SCRUB_SENSITIVE_CALL_DATA").strip().lower()
-        api_key = load_and_validate_env("RETELL_API_KEY")
-        from_phone_num = load_and_validate_env("FROM_PHONE_NUMBER")
-        to_phone_num = load_and_validate_env("TO_PHONE_NUMBER")
-        max_wait_time = load_and_validate_env("MAX_WAIT_TIME", int)
-        wait_interval = load_and_validate_env("WAIT_INTERVAL", int)
-        my_full_name = load_and_validate_env("MY_FULL_NAME")
-        my_phone_number = load_and_validate_env("MY_PHONE_NUMBER")
-        my_ssn = load_and_validate_env("MY_SSN")
-    except Exception as e:
-        logging.error(f"Environment setup failed: {e}", exc_info=True)
-        return
+    if config is None:
+        logging.info("Loading environment variables")
+        try:
+            config = Config.from_env()
+        except Exception as e:
+            logging.error(f"Environment setup failed: {e}", exc_info=True)
+            return
 
-    sync_client = Retell(api_key=api_key)
-    current_date_time = datetime.now().strftime("%Y%m%d%H%M%S")
-    call_log_dir = './logs/call_logs'
+    sync_client = Retell(api_key=config.retell_api_key)
+    current_date_time = run_started_at.strftime("%Y%m%d%H%M%S")
 
     variables = {
-        "my_full_name": my_full_name,
-        "my_phone_number": my_phone_number,
-        "my_ssn": my_ssn
+        "my_full_name": config.my_full_name,
+        "my_phone_number": config.my_phone_number,
+        "my_ssn": config.my_ssn
     }
 
+    webhook_server = None
+    if config.webhook_port:
+        # Start listening before the call is created so no event is missed
+        try:
+            webhook_server = start_webhook_server(
+                sync_client, config.retell_api_key, config.webhook_port, WEBHOOK_EVENT_DB
+            )
+        except Exception:
+            logging.error("Failed to start webhook receiver. Falling back to polling.", exc_info=True)
+
     try:
-        call_id = create_phone_call(sync_client, from_phone_num, to_phone_num, variables)
+        call_id = create_phone_call(sync_client, config.from_phone_number, config.to_phone_number, variables)
     except Exception:
         logging.error("Failed to initiate phone call. Exiting.")
+        if webhook_server:
+            stop_webhook_server(webhook_server)
         return
 
-    call_response = poll_call_status(sync_client, call_id, max_wait_time, wait_interval)
+    # All files for this call share the same path prefix
+    run_prefix = os.path.join(CALL_LOG_DIR, f"{current_date_time}_{call_id}")
+
+    if webhook_server:
+        call_response = wait_for_call_end(sync_client, call_id, config.max_wait_time, WEBHOOK_EVENT_DB)
+        stop_webhook_server(webhook_server)
+    else:
+        call_response = poll_call_status(sync_client, call_id, config.max_wait_time, config.wait_interval)
     if not call_response:
         logging.error("No call response retrieved. Exiting.")
         return
     
     try:
         # Save the call_response JSON
-        json_file_path = f"{call_log_dir}/{current_date_time}_{call_id}.json"
-        call_response_json = call_response.to_json()
-        with open(json_file_path, "w", encoding="utf-8") as json_file:
-            json_file.write(call_response_json)
+        json_file_path = run_prefix + ".json"
+        if hasattr(call_response, 'model_dump'):
+            # Same shape as the SDK's to_json(): API field names, only fields Retell returned
+            call_response_data = call_response.model_dump(mode='json', by_alias=True, exclude_unset=True)
+        else:
+            call_response_data = json.loads(call_response.to_json())
+        with open(json_file_path, "wb") as json_file:
+            json_file.write(orjson.dumps(call_response_data, option=orjson.OPT_INDENT_2))
         logging.info(f"Call response saved as JSON at: {json_file_path}")
     except Exception as e:
         logging.error(f"Failed to save call response JSON: {e}", exc_info=True)
@@ -282,11 +775,12 @@ def main() -> None:
         recording_url = getattr(call_response, 'recording_url', '-')
         log_url = getattr(call_response, 'public_log_url', '-')
 
-        recording_file_path = f"{call_log_dir}/{current_date_time}_{call_id}.wav"
-        download_file(recording_url, recording_file_path)
-
-        call_log_file = f"{call_log_dir}/{current_date_time}_{call_id}.log"
-        download_file(log_url, call_log_file)
+        recording_file_path = run_prefix + ".wav"
+        call_log_file = run_prefix + ".log"
+        download_files([
+            (recording_url, recording_file_path),
+            (log_url, call_log_file),
+        ])
 
     except Exception as e:
         logging.error(f"Error extracting or downloading call details: {e}", exc_info=True)
@@ -300,7 +794,7 @@ def main() -> None:
     logging.info(f"Call Summary: {summary}")
 
     # Optionally scrub sensitive call data
-    if scrub_sensitive_data in ('yes', 'true', '1'):
+    if config.scrub_sensitive_call_data:
         logging.info("Scrubbing sensitive call data as requested.")
         try:
             updated_call = scrub_call_data(sync_client=sync_client, call_id=call_id)